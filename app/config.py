@@ -1,4 +1,5 @@
 import os
+from typing import Literal, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -6,8 +7,45 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     app_name: str = "FastAPI Catalogo Poli"
     db_url: str = "sqlite:///./test.db"
-    jwt_secret: str = os.getenv("JWT_SECRET")
-    jwt_algorithm: str = os.getenv("JWT_ALGORITHM")
+    # Read replicas for read-only endpoints, e.g. '["sqlite:///./replica1.db"]'
+    db_replica_urls: list[str] = []
+    # After committing, a user reads from the primary for this long
+    db_replica_sticky_seconds: float = 5.0
+    db_replica_health_seconds: float = 10.0
+    # SQLite performance profile: WAL, tuned pragmas, a single serialized writer
+    # connection and a separate pool of reader connections
+    sqlite_performance: bool = False
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    sqlite_mmap_size: int = 268435456
+    # Negative values are KiB, as in PRAGMA cache_size
+    sqlite_cache_size: int = -65536
+    sqlite_busy_timeout: int = 5000
+    sqlite_read_pool_size: int = 10
+    # Primary keys: time-ordered uuid7/ulid keep inserts at the end of the
+    # index. ID_BINARY stores keys as 16 bytes instead of text; existing
+    # databases must be converted with `python -m app.db.migrate_ids`
+    id_strategy: Literal["uuid4", "uuid7", "ulid"] = "uuid7"
+    id_binary: bool = False
+    jwt_secret: Optional[str] = os.getenv("JWT_SECRET")
+    jwt_algorithm: Optional[str] = os.getenv("JWT_ALGORITHM")
+    # Responses smaller than this (in bytes) are sent uncompressed
+    compression_min_size: int = 500
+    gzip_level: int = 6
+    brotli_quality: int = 5
+    zstd_level: int = 3
+    # Minimum trigram similarity for a fuzzy search token match (0-1)
+    search_min_similarity: float = 0.4
+    job_workers: int = 2
+    job_max_attempts: int = 5
+    # Retry delay is job_backoff_seconds * 2 ** (attempt - 1)
+    job_backoff_seconds: float = 2.0
+    job_poll_interval: float = 1.0
+    # Change feed: events held per slow client before it must resync
+    stream_max_pending: int = 1000
+    stream_heartbeat_seconds: float = 15.0
+    # Stock held for a cart line after it is added or changed
+    reservation_ttl_seconds: int = 900
+    reservation_sweep_seconds: float = 60.0
 
 
 settings = Settings()
@@ -1,8 +1,116 @@
-from sqlalchemy import create_engine
+import logging
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import Delete, Insert, Update, create_engine, event
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
 
 from app.config import settings
+from app.db.replicas import ReplicaSet, current_user_id, replica_reads
+
+logger = logging.getLogger(__name__)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout)}")
+    cursor.close()
+
+
+def create_engines(url: str, performance: bool = False):
+    """
+    returns (writer, reader) engines for url. Without the performance profile
+    both are the same engine. With it, SQLite runs in WAL mode, writes go
+    through a single pooled connection so writers queue in-process instead
+    of spinning on SQLITE_BUSY, and readers get their own pool.
+    """
+    connect_args = {"check_same_thread": False}
+    if not (performance and url.startswith("sqlite")):
+        engine = create_engine(url, connect_args=connect_args)
+        return engine, engine
+    timeout = settings.sqlite_busy_timeout / 1000
+    writer = create_engine(
+        url,
+        connect_args={**connect_args, "timeout": timeout},
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=timeout,
+    )
+    reader = create_engine(
+        url,
+        connect_args={**connect_args, "timeout": timeout},
+        pool_size=settings.sqlite_read_pool_size,
+        max_overflow=settings.sqlite_read_pool_size,
+    )
+    event.listen(writer, "connect", _set_sqlite_pragmas)
+    event.listen(reader, "connect", _set_sqlite_pragmas)
+    return writer, reader
+
+
+class RoutingSession(Session):
+    """
+    Session that flushes and runs INSERT/UPDATE/DELETE statements on the
+    writer engine and every other query on the reader engine, or on a read
+    replica inside db_instance.read_replica()
+    """
+
+    def __init__(self, writer=None, reader=None, replicas=None, **kwargs):
+        kwargs["bind"] = writer
+        super().__init__(**kwargs)
+        self.writer = writer
+        self.reader = reader or writer
+        self.replicas = replicas
+        self._replica = None  # replica picked for the statement being run
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.info["wrote"] = True
+            return self.writer
+        if self.replicas is not None and replica_reads.get():
+            replica = self.replicas.choose()
+            if replica is not None:
+                self._replica = replica
+                return replica
+        return self.reader
+
+    def execute(self, statement, params=None, **kwargs):
+        """
+        runs statement; a read that fails on a replica takes the replica out
+        of rotation and is retried on the primary
+        """
+        self._replica = None
+        try:
+            return super().execute(statement, params, **kwargs)
+        except OperationalError:
+            replica, self._replica = self._replica, None
+            if replica is None:
+                raise
+            logger.warning("Read on replica %s failed, using the primary", replica.url)
+            self.replicas.mark_unhealthy(replica)
+        token = replica_reads.set(False)
+        try:
+            return super().execute(statement, params, **kwargs)
+        finally:
+            replica_reads.reset(token)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _stick_to_primary(session):
+    # Read-your-writes: the committing user skips replicas for a while
+    user_id = current_user_id.get()
+    if session.info.pop("wrote", False) and session.replicas and user_id:
+        session.replicas.mark_write(user_id)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_writes(session):
+    session.info.pop("wrote", None)
 
 
 class SingletonDatabaseConnection:
@@ -15,21 +123,74 @@ class SingletonDatabaseConnection:
         return cls._instance
 
     def init_db(self):
-        # Initialize the connection
+        # Engines and sessions are created on first use, not at import time
         self.SQLALCHEMY_DATABASE_URL = settings.db_url
-        self.engine = create_engine(
-            self.SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-        )
-        self.session = scoped_session(
-            sessionmaker(
-                autocommit=False,
-                autoflush=False,
-                expire_on_commit=False,
-                bind=self.engine,
-            )
-        )
+        self._lock = threading.Lock()
+        self._engines = None
+        self._replicas = None
+        self._session = None
         self.Base = declarative_base()
 
+    def _connect(self):
+        with self._lock:
+            if self._engines is None:
+                self._engines = create_engines(
+                    self.SQLALCHEMY_DATABASE_URL, settings.sqlite_performance
+                )
+                if settings.db_replica_urls:
+                    self._replicas = ReplicaSet(
+                        settings.db_replica_urls, primary=self._engines[0]
+                    )
+                self._session = scoped_session(
+                    sessionmaker(
+                        class_=RoutingSession,
+                        autocommit=False,
+                        autoflush=False,
+                        expire_on_commit=False,
+                        writer=self._engines[0],
+                        reader=self._engines[1],
+                        replicas=self._replicas,
+                    )
+                )
+
+    @property
+    def engine(self):
+        if self._engines is None:
+            self._connect()
+        return self._engines[0]
+
+    @property
+    def read_engine(self):
+        if self._engines is None:
+            self._connect()
+        return self._engines[1]
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._connect()
+        return self._session
+
+    @property
+    def replicas(self):
+        if self._engines is None:
+            self._connect()
+        return self._replicas
+
+    @contextmanager
+    def read_replica(self):
+        """
+        routes the reads of the enclosed read-only code to a replica
+        """
+        token = replica_reads.set(True)
+        try:
+            yield
+        finally:
+            replica_reads.reset(token)
+            if self.replicas is not None:
+                # Hand replica connections back and drop rows read from them
+                self.session.rollback()
+
     def get_session(self):
         return self.session
 
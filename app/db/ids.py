@@ -0,0 +1,98 @@
+import os
+import time
+import uuid
+
+from sqlalchemy import LargeBinary, String
+from sqlalchemy.types import TypeDecorator
+
+from app.config import settings
+
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_CROCKFORD_VALUES = {char: value for value, char in enumerate(CROCKFORD)}
+
+
+def _time_ordered_bytes() -> bytes:
+    # 48-bit big-endian millisecond timestamp followed by 80 random bits
+    return (time.time_ns() // 1_000_000).to_bytes(6, "big") + os.urandom(10)
+
+
+def uuid7() -> uuid.UUID:
+    raw = bytearray(_time_ordered_bytes())
+    raw[6] = 0x70 | (raw[6] & 0x0F)  # version 7
+    raw[8] = 0x80 | (raw[8] & 0x3F)  # RFC 4122 variant
+    return uuid.UUID(bytes=bytes(raw))
+
+
+def ulid_to_str(raw: bytes) -> str:
+    value = int.from_bytes(raw, "big")
+    return "".join(CROCKFORD[(value >> shift) & 0x1F] for shift in range(125, -1, -5))
+
+
+def ulid_from_str(text: str) -> bytes:
+    if len(text) != 26:
+        raise ValueError(text)
+    value = 0
+    for char in text.upper():
+        value = (value << 5) | _CROCKFORD_VALUES[char]
+    return value.to_bytes(16, "big")
+
+
+def new_id() -> str:
+    """
+    returns a new primary key in its string form, following ID_STRATEGY.
+    Binary keys always read back as UUID text, so ulid keys use that form too
+    """
+    if settings.id_strategy == "ulid":
+        raw = _time_ordered_bytes()
+        return str(uuid.UUID(bytes=raw)) if settings.id_binary else ulid_to_str(raw)
+    if settings.id_strategy == "uuid7":
+        return str(uuid7())
+    return str(uuid.uuid4())
+
+
+def id_to_bytes(value: str) -> bytes:
+    """
+    accepts UUID text and, so links issued before ID_BINARY keep working,
+    26-character ULID text
+    """
+    try:
+        if len(value) == 26:
+            return ulid_from_str(value)
+        return uuid.UUID(value).bytes
+    except (KeyError, ValueError, OverflowError):
+        # Not a valid id: store/compare the raw text, which never matches a key
+        return value.encode()
+
+
+def id_from_bytes(value: bytes) -> str:
+    # Independent of ID_STRATEGY, so changing it never changes existing ids
+    if len(value) != 16:
+        return value.decode()
+    return str(uuid.UUID(bytes=value))
+
+
+class CompactId(TypeDecorator):
+    """
+    16-byte binary key column that reads and writes the key's string form,
+    so ids stay strings everywhere outside the database
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        return id_to_bytes(str(value))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return id_from_bytes(value)
+
+
+def IdType():
+    """
+    column type for primary and foreign keys, following ID_BINARY
+    """
+    return CompactId() if settings.id_binary else String()
@@ -0,0 +1,80 @@
+"""
+Copies a database with text primary keys into a new database that uses the
+current key columns (16-byte binary keys when ID_BINARY is set):
+
+    ID_BINARY=true python -m app.db.migrate_ids sqlite:///./test.db sqlite:///./compact.db
+
+Existing keys keep their value, only their storage changes. Point DB_URL at
+the new database once the copy finishes.
+"""
+
+import argparse
+
+from sqlalchemy import MetaData, create_engine, inspect, select
+
+import app.models.models  # noqa: F401  registers every table on Base
+from app.db.database import Base
+from app.db.ids import CompactId, id_to_bytes
+
+BATCH_SIZE = 1000
+
+
+def migrate(source_url: str, target_url: str):
+    source = create_engine(source_url)
+    target = create_engine(target_url)
+    if inspect(target).get_table_names():
+        raise SystemExit(f"{target_url} is not empty")
+    Base.metadata.create_all(bind=target)
+    source_tables = MetaData()
+    source_tables.reflect(bind=source)
+
+    try:
+        with source.connect() as reader, target.begin() as writer:
+            # sorted_tables yields parents before children, so foreign keys resolve
+            for table in Base.metadata.sorted_tables:
+                if table.name not in source_tables.tables:
+                    continue
+                old_table = source_tables.tables[table.name]
+                columns = [c.name for c in table.columns if c.name in old_table.c]
+                key_columns = [
+                    name
+                    for name in columns
+                    if isinstance(table.c[name].type, CompactId)
+                ]
+                result = reader.execution_options(yield_per=BATCH_SIZE).execute(
+                    select(*(old_table.c[name] for name in columns))
+                )
+                copied = 0
+                for rows in result.partitions():
+                    _check_keys(table.name, key_columns, rows)
+                    # Text keys are rebound through the target column types
+                    writer.execute(table.insert(), [dict(row._mapping) for row in rows])
+                    copied += len(rows)
+                print(f"{table.name}: {copied} rows")
+    except SystemExit:
+        # Leave the target empty so the copy can be retried
+        Base.metadata.drop_all(bind=target)
+        raise
+
+
+def _check_keys(table_name, key_columns, rows):
+    # Keys that are neither UUID nor ULID text would be stored as raw text
+    for row in rows:
+        for name in key_columns:
+            value = row._mapping[name]
+            if value is not None and len(id_to_bytes(str(value))) != 16:
+                raise SystemExit(
+                    f"{table_name}.{name}: {value!r} is not a UUID or ULID key"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("source_url")
+    parser.add_argument("target_url")
+    args = parser.parse_args()
+    migrate(args.source_url, args.target_url)
+
+
+if __name__ == "__main__":
+    main()
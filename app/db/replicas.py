@@ -0,0 +1,113 @@
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import create_engine
+
+from app.config import settings
+from app.db.schema import stored_version
+
+logger = logging.getLogger(__name__)
+
+# Set by read_replica() around read-only endpoint code
+replica_reads = ContextVar("replica_reads", default=False)
+# Set once the request is authenticated, for read-your-writes stickiness
+current_user_id = ContextVar("current_user_id", default=None)
+
+
+class ReplicaSet:
+    """
+    Read replicas picked round-robin among those that passed the last health
+    check. Users who committed a write recently are kept on the primary so
+    they read their own writes despite replica lag.
+    """
+
+    def __init__(self, urls, primary=None):
+        self.primary = primary
+        self.engines = [
+            (
+                create_engine(url, connect_args={"check_same_thread": False})
+                if url.startswith("sqlite")
+                else create_engine(url)
+            )
+            for url in urls
+        ]
+        self._healthy = list(self.engines)
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._recent_writers = {}  # user id -> monotonic deadline
+        self._task = None
+
+    async def start(self):
+        await asyncio.to_thread(self.check)
+        self._task = asyncio.create_task(self._monitor())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _monitor(self):
+        while True:
+            await asyncio.sleep(settings.db_replica_health_seconds)
+            await asyncio.to_thread(self.check)
+
+    def choose(self):
+        """
+        returns the next healthy replica engine, or None to use the primary
+        """
+        user_id = current_user_id.get()
+        if user_id is not None and self._wrote_recently(user_id):
+            return None
+        healthy = self._healthy
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    def mark_write(self, user_id):
+        deadline = time.monotonic() + settings.db_replica_sticky_seconds
+        with self._lock:
+            self._recent_writers[user_id] = deadline
+
+    def _wrote_recently(self, user_id) -> bool:
+        with self._lock:
+            deadline = self._recent_writers.get(user_id)
+            if deadline is None:
+                return False
+            if deadline > time.monotonic():
+                return True
+            del self._recent_writers[user_id]
+            return False
+
+    def mark_unhealthy(self, engine):
+        """
+        takes a replica out of rotation until it passes a health check
+        """
+        with self._lock:
+            self._healthy = [e for e in self._healthy if e is not engine]
+
+    def check(self):
+        """
+        keeps in rotation only the replicas that hold the primary's schema.
+        A bare connection test would pass on an empty database
+        """
+        expected = stored_version(self.primary) if self.primary else None
+        healthy = []
+        for engine in self.engines:
+            version = stored_version(engine)
+            if version is not None and expected in (None, version):
+                healthy.append(engine)
+            else:
+                logger.warning("Replica %s failed its health check", engine.url)
+        self._healthy = healthy
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writers = {
+                user_id: deadline
+                for user_id, deadline in self._recent_writers.items()
+                if deadline > now
+            }
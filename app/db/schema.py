@@ -0,0 +1,78 @@
+import hashlib
+import logging
+
+from sqlalchemy import Column, MetaData, String, Table, inspect, select
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+# Kept apart from Base so create_all on the models never touches it
+_schema_info = Table(
+    "schema_info",
+    MetaData(),
+    Column("version", String, primary_key=True),
+)
+
+
+def schema_version(metadata) -> str:
+    """
+    returns a fingerprint of the tables, columns and indexes in metadata
+    """
+    parts = []
+    for table in metadata.sorted_tables:
+        parts.append(table.name)
+        for column in table.columns:
+            parts.append(
+                f"{column.name}:{column.type!r}:{column.nullable}:{column.primary_key}"
+            )
+        parts.extend(sorted(index.name for index in table.indexes))
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def stored_version(engine) -> str | None:
+    """
+    returns the schema version recorded in the database, or None when there
+    is none or the database cannot be read
+    """
+    try:
+        with engine.connect() as connection:
+            return connection.execute(select(_schema_info.c.version)).scalar()
+    except DBAPIError:
+        return None  # schema_info does not exist yet
+
+
+def ensure_schema(engine, metadata) -> bool:
+    """
+    creates missing tables and indexes only when the stored schema version
+    differs from the models, so a normal boot costs one query. Returns True
+    when the schema was (re)applied
+    """
+    version = schema_version(metadata)
+    if stored_version(engine) == version:
+        return False
+    metadata.create_all(bind=engine)
+    # create_all skips tables that already exist: indexes added to them later
+    # are created here, missing columns need a migration
+    inspector = inspect(engine)
+    complete = True
+    for table in metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing = [c.name for c in table.columns if c.name not in existing]
+        if missing:
+            logger.error(
+                "Table %s lacks columns %s; add them with a migration",
+                table.name,
+                ", ".join(missing),
+            )
+            complete = False
+        for index in table.indexes:
+            if all(column.name in existing for column in index.columns):
+                index.create(bind=engine, checkfirst=True)
+    if not complete:
+        # Not recorded, so the check runs again on the next boot
+        return True
+    with engine.begin() as connection:
+        _schema_info.create(bind=connection, checkfirst=True)
+        connection.execute(_schema_info.delete())
+        connection.execute(_schema_info.insert().values(version=version))
+    return True
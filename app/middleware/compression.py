@@ -0,0 +1,119 @@
+import gzip
+from importlib import import_module
+from importlib.util import find_spec
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import settings
+
+
+def _gzip(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=settings.gzip_level)
+
+
+def _brotli(data: bytes) -> bytes:
+    return import_module("brotli").compress(data, quality=settings.brotli_quality)
+
+
+def _zstd(data: bytes) -> bytes:
+    compressor = import_module("zstandard").ZstdCompressor(level=settings.zstd_level)
+    return compressor.compress(data)
+
+
+# Server preference order, best ratio/speed trade-off first. brotli and
+# zstandard are optional and only imported on first use
+ENCODERS = {
+    name: encoder
+    for name, encoder, available in (
+        ("zstd", _zstd, find_spec("zstandard") is not None),
+        ("br", _brotli, find_spec("brotli") is not None),
+        ("gzip", _gzip, True),
+    )
+    if available
+}
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    """
+    returns the best supported encoding accepted by the client, or None
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    candidates = [
+        (accepted.get(name, wildcard), -index, name)
+        for index, name in enumerate(ENCODERS)
+    ]
+    quality, _, name = max(candidates)
+    return name if quality > 0 else None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    return ENCODERS[encoding](data)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses complete response bodies with the best
+    encoding negotiated from Accept-Encoding. Streaming responses and responses
+    that already carry a Content-Encoding are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int | None = None):
+        self.app = app
+        self.minimum_size = (
+            settings.compression_min_size if minimum_size is None else minimum_size
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                if "content-encoding" in Headers(raw=message["headers"]):
+                    passthrough = True
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            if start_message is None:
+                # Start already forwarded: this is a streamed body
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if not message.get("more_body", False) and len(body) >= self.minimum_size:
+                body = compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = {**message, "body": body}
+            await send(start_message)
+            start_message = None
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,84 @@
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models.models import Article
+
+logger = logging.getLogger(__name__)
+
+ARTICLE_FIELDS = ("name", "category", "description", "price", "stock")
+
+_listeners = []
+
+
+@dataclass(frozen=True)
+class ArticleChange:
+    """
+    a committed Article insert, update or delete. `before` is None for
+    inserts and `after` is None for deletes
+    """
+
+    op: str
+    article_id: str
+    before: dict | None
+    after: dict | None
+
+
+def on_article_commit(func):
+    """
+    registers func(changes: list[ArticleChange]) to run after every commit
+    that inserted, updated or deleted articles
+    """
+    _listeners.append(func)
+    return func
+
+
+def _snapshot(article, committed=False):
+    state = inspect(article)
+    values = {}
+    for field in ARTICLE_FIELDS:
+        history = state.attrs[field].history
+        if committed and history.deleted:
+            values[field] = history.deleted[0]
+        else:
+            values[field] = getattr(article, field)
+    return values
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_article_changes(session, flush_context):
+    changes = session.info.setdefault("article_changes", [])
+    for obj in session.new:
+        if isinstance(obj, Article):
+            changes.append(ArticleChange("insert", obj.id, None, _snapshot(obj)))
+    for obj in session.dirty:
+        if isinstance(obj, Article) and session.is_modified(obj):
+            before = _snapshot(obj, committed=True)
+            after = _snapshot(obj)
+            if before != after:
+                changes.append(ArticleChange("update", obj.id, before, after))
+    for obj in session.deleted:
+        if isinstance(obj, Article):
+            changes.append(
+                ArticleChange("delete", obj.id, _snapshot(obj, committed=True), None)
+            )
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_article_changes(session):
+    changes = session.info.pop("article_changes", None)
+    if not changes:
+        return
+    for listener in _listeners:
+        try:
+            listener(changes)
+        except Exception:
+            # The transaction is already committed, never fail the request here
+            logger.exception("Article change listener %r failed", listener)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_article_changes(session):
+    session.info.pop("article_changes", None)
@@ -1,21 +1,25 @@
 import json
 from datetime import UTC, datetime
-from uuid import uuid4
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (Column, DateTime, ForeignKey, Index, Integer, String,
+                        Text, UniqueConstraint)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.sqltypes import Float
 from starlette.requests import Request
 
 from app.db.database import Base
+from app.db.ids import IdType, new_id
 from app.models.schemas.products import CreateArticleForm
 
 
 class AppBaseModel:
-    id = Column(String, primary_key=True, index=True)
-    created_at = Column(DateTime, nullable=False, default=datetime.now(UTC))
+    id = Column(IdType(), primary_key=True, index=True)
+    created_at = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
     updated_at = Column(
-        DateTime, nullable=False, default=datetime.now(UTC), onupdate=datetime.now(UTC)
+        DateTime,
+        nullable=False,
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
     )
 
     def __init__(self, *args, **kwargs):
@@ -25,14 +29,14 @@ class AppBaseModel:
         if kwargs:
             self.__set_attributes(kwargs)
         else:
-            self.id = str(uuid4())
+            self.id = new_id()
 
     def __set_attributes(self, attr_dict):
         """
         private: converts attr_dict values to python class attributes
         """
         if "id" not in attr_dict:
-            attr_dict["id"] = str(uuid4())
+            attr_dict["id"] = new_id()
         for attr, val in attr_dict.items():
             setattr(self, attr, val)
 
@@ -70,6 +74,8 @@ class AppBaseModel:
 
 class User(AppBaseModel, Base):
     __tablename__ = "users"
+    # Role filter plus keyset pagination on id in one index range scan
+    __table_args__ = (Index("ix_users_role_id", "role", "id"),)
     full_name = Column(String)
     username = Column(String, unique=True, index=True)  # same as email
     hashed_password = Column(String)
@@ -77,6 +83,8 @@ class User(AppBaseModel, Base):
 
     __mapper_args__ = {"polymorphic_on": role, "polymorphic_identity": "user"}
 
+    PUBLIC_COLUMNS = ("id", "full_name", "username", "role", "created_at")
+
 
 class Admin(User):
     __mapper_args__ = {
@@ -97,10 +105,21 @@ class Admin(User):
         return new_article.to_json()
 
     @staticmethod
-    def get_all_shoppers(request: Request):
-        shoppers = request.app.db.query(Shopper).all()
-        shoppers = [shopper.to_json() for shopper in shoppers] if shoppers else []
-        return shoppers
+    def get_all_shoppers(
+        request: Request, limit: int = 100, after_id: str | None = None, session=None
+    ):
+        """
+        returns up to `limit` shoppers with id greater than after_id, ordered
+        by id and loading only the public columns
+        """
+        session = session or request.app.db
+        query = session.query(
+            *(getattr(User, column) for column in User.PUBLIC_COLUMNS)
+        ).filter(User.role == "shopper")
+        if after_id:
+            query = query.filter(User.id > after_id)
+        rows = query.order_by(User.id).limit(limit).all()
+        return [{**row._asdict(), "created_at": str(row.created_at)} for row in rows]
 
 
 class Shopper(User):
@@ -111,23 +130,67 @@ class Shopper(User):
 
 class Article(AppBaseModel, Base):
     __tablename__ = "article"
+    __table_args__ = (Index("ix_article_created_at_id", "created_at", "id"),)
     name = Column(String, index=True)
     category = Column(String, index=True)
     description = Column(String)
-    price = Column(Float)
+    price = Column(Float, index=True)
     stock = Column(Integer)
 
 
 class Cart(AppBaseModel, Base):
     __tablename__ = "carts"
-    user_id = Column(String, ForeignKey("users.id"))
+    user_id = Column(IdType(), ForeignKey("users.id"))
     items = relationship("CartItemModel", back_populates="cart")
 
 
 class CartItemModel(AppBaseModel, Base):
     __tablename__ = "cart_items"
-    cart_id = Column(String, ForeignKey("carts.id"))
-    article_id = Column(String, ForeignKey("article.id"))
+    cart_id = Column(IdType(), ForeignKey("carts.id"))
+    article_id = Column(IdType(), ForeignKey("article.id"))
     quantity = Column(Integer)
     cart = relationship("Cart", back_populates="items")
     article = relationship("Article")
+
+
+class Reservation(AppBaseModel, Base):
+    __tablename__ = "reservations"
+    __table_args__ = (UniqueConstraint("cart_id", "article_id"),)
+    cart_id = Column(IdType(), ForeignKey("carts.id"), nullable=False)
+    article_id = Column(IdType(), ForeignKey("article.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class Job(AppBaseModel, Base):
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_run_after", "status", "run_after"),)
+    kind = Column(String, nullable=False)
+    payload = Column(Text)
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_after = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
+    last_error = Column(String)
+    result = Column(Text)
+    user_id = Column(IdType(), ForeignKey("users.id"))
+
+
+class Order(AppBaseModel, Base):
+    __tablename__ = "orders"
+    __table_args__ = (Index("ix_orders_user_id_created_at", "user_id", "created_at"),)
+    user_id = Column(IdType(), ForeignKey("users.id"), nullable=False)
+    total_price = Column(Float, nullable=False)
+    total_quantity = Column(Integer, nullable=False)
+    lines = relationship("OrderLine", back_populates="order")
+
+
+class OrderLine(AppBaseModel, Base):
+    __tablename__ = "order_lines"
+    order_id = Column(IdType(), ForeignKey("orders.id"), index=True, nullable=False)
+    # Snapshot of the article at purchase time; the article may change or go away
+    article_id = Column(IdType(), nullable=False)
+    name = Column(String)
+    unit_price = Column(Float, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    order = relationship("Order", back_populates="lines")
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class CartItem(BaseModel):
     article_id: str
-    quantity: int
+    quantity: int = Field(gt=0)
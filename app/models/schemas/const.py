@@ -26,3 +26,19 @@ CATEGORIES = Literal[
     "Productos Ecológicos y Sostenibles",
     "Cocina",
 ]
+
+ARTICLE_FIELDS = Literal[
+    "name",
+    "category",
+    "description",
+    "price",
+    "stock",
+    "created_at",
+    "updated_at",
+]
+
+ARTICLE_SORT_FIELDS = Literal["price", "name", "created_at"]
+
+SORT_ORDERS = Literal["asc", "desc"]
+
+JOB_STATUSES = Literal["pending", "running", "done", "failed"]
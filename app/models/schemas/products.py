@@ -1,8 +1,9 @@
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from app.models.schemas.const import CATEGORIES
+from app.models.schemas.const import (ARTICLE_FIELDS, ARTICLE_SORT_FIELDS,
+                                      CATEGORIES, SORT_ORDERS)
 
 
 class CreateArticleForm(BaseModel):
@@ -29,3 +30,11 @@ class AdvancedSearchForm(BaseModel):
     category: Optional[CATEGORIES] = None
     min_price: Optional[float] = None
     max_price: Optional[float] = None
+    in_stock: Optional[bool] = None
+    min_stock: Optional[int] = None
+    sort_by: Optional[ARTICLE_SORT_FIELDS] = None
+    sort_order: SORT_ORDERS = "asc"
+    fields: Optional[List[ARTICLE_FIELDS]] = None
+    limit: int = Field(default=100, ge=1, le=1000)
+    offset: int = Field(default=0, ge=0)
+    cursor: Optional[str] = None
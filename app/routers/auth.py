@@ -1,17 +1,16 @@
-import os
 from datetime import UTC, datetime, timedelta
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import Optional
 
-from dotenv import load_dotenv
 from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import EmailStr
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
+from app.config import settings
+from app.db.replicas import current_user_id
 from app.models.models import Admin, Shopper, User
 from app.models.schemas.auth import LoginForm, RegisterForm
 
@@ -21,28 +20,23 @@ router = APIRouter(
     responses={status.HTTP_401_UNAUTHORIZED: {"user": "Not authorized"}},
 )
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
-load_dotenv()
-SECRET_KEY = os.getenv("JWT_SECRET")
-ALGORITHM = os.getenv("JWT_ALGORITHM")
 
-# Verificar que las variables de entorno se cargan correctamente
-if not SECRET_KEY:
-    print("⚠️  ADVERTENCIA: JWT_SECRET no encontrado en variables de entorno")
-if not ALGORITHM:
-    print("⚠️  ADVERTENCIA: JWT_ALGORITHM no encontrado en variables de entorno")
-else:
-    print(f"✅ JWT configurado con algoritmo: {ALGORITHM}")
+@lru_cache(maxsize=None)
+def get_bcrypt_context():
+    # passlib is slow to import and only needed once someone logs in
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def get_password_hash(password):
-    return bcrypt_context.hash(password)
+    return get_bcrypt_context().hash(password)
 
 
 def verify_password(plain_password, hashed_password):
-    return bcrypt_context.verify(plain_password, hashed_password)
+    return get_bcrypt_context().verify(plain_password, hashed_password)
 
 
 def get_user(request: Request, username: EmailStr):
@@ -70,19 +64,24 @@ def create_access_token(
     else:
         expire = datetime.now(UTC) + timedelta(minutes=15)
     encode.update({"exp": expire})
-    return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(encode, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
 
 def get_current_user(request: Request, token: str):
     try:
         if token is None:
             return None
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(
+            token, settings.jwt_secret, algorithms=[settings.jwt_algorithm]
+        )
         email: str = payload.get("sub")
         user_id: str = payload.get("id")
         if email is None or user_id is None:
             return None
-        return get_user(request, email)
+        user = get_user(request, email)
+        if user:
+            current_user_id.set(user.id)
+        return user
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
@@ -101,7 +100,9 @@ def admin_only():
                     status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token"
                 )
             try:
-                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+                payload = jwt.decode(
+                    token, settings.jwt_secret, algorithms=[settings.jwt_algorithm]
+                )
                 user_email = payload.get("sub")
                 user = await get_user(request, user_email)
                 if user.get("role") != "admin":
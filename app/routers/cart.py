@@ -2,9 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
 
-from app.models.models import Article, Cart, CartItemModel
+from app.db.database import db_instance
+from app.models.models import (Article, Cart, CartItemModel, Order, OrderLine,
+                               Reservation)
 from app.models.schemas.cart import CartItem
 from app.routers.auth import get_current_user
+from app.services.reservations import (hold_stock, release_stock,
+                                       reservation_ledger)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 router = APIRouter(
@@ -35,9 +39,23 @@ def purchase_items(
         )
     total_price = 0
     total_quantity = 0
+    order = Order(user_id=user.id)
     for item in cart.items:
-        article = request.app.db.query(Article).filter_by(id=item.article_id).first()
-        if not article or article.stock < item.quantity:
+        # Re-read: the order snapshots the current name and price, and the
+        # thread's session may hold this article from an older request
+        article = (
+            request.app.db.query(Article)
+            .populate_existing()
+            .filter_by(id=item.article_id)
+            .first()
+        )
+        if (
+            not article
+            or reservation_ledger.available(article, exclude_cart=cart.id)
+            < item.quantity
+        ):
+            # Undo the stock already decremented for previous lines
+            request.app.db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Stock insuficiente para algunos artículos",
@@ -45,7 +63,20 @@ def purchase_items(
         total_price += article.price * item.quantity
         article.stock -= item.quantity
         total_quantity += item.quantity
+        request.app.db.add(
+            OrderLine(
+                order_id=order.id,
+                article_id=article.id,
+                name=article.name,
+                unit_price=article.price,
+                quantity=item.quantity,
+            )
+        )
 
+    order.total_price = total_price
+    order.total_quantity = total_quantity
+    request.app.db.add(order)
+    release_stock(request.app.db, cart.id)
     request.app.db.query(CartItemModel).filter_by(cart_id=cart.id).delete()
     request.app.db.delete(cart)
     request.app.db.commit()
@@ -54,6 +85,7 @@ def purchase_items(
             "message": "Compra realizada con éxito",
             "cantidad_articulos": len(cart.items),
             "precio_total": total_price,
+            "pedido_id": order.id,
         },
         status_code=status.HTTP_200_OK,
     )
@@ -75,16 +107,25 @@ def add_to_cart(
         cart = Cart(user_id=user.id)
         request.app.db.add(cart)
         request.app.db.commit()
-    article = request.app.db.query(Article).filter_by(id=purchase.article_id).first()
-    if not article or article.stock < purchase.quantity:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Stock insuficiente"
-        )
+    # Holds are checked against article.stock, so read the current row
+    article = (
+        request.app.db.query(Article)
+        .populate_existing()
+        .filter_by(id=purchase.article_id)
+        .first()
+    )
     cart_item = (
         request.app.db.query(CartItemModel)
-        .filter_by(cart_id=cart.id, article_id=article.id)
+        .populate_existing()
+        .filter_by(cart_id=cart.id, article_id=purchase.article_id)
         .first()
     )
+    # Hold the whole line quantity, not just what is being added now
+    quantity = purchase.quantity + (cart_item.quantity if cart_item else 0)
+    if not article or not hold_stock(request.app.db, cart.id, article, quantity):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Stock insuficiente"
+        )
     if cart_item:
         cart_item.quantity += purchase.quantity
     else:
@@ -126,6 +167,7 @@ def remove_from_cart(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Artículo no encontrado en el carrito",
         )
+    release_stock(request.app.db, cart.id, article_id)
     request.app.db.delete(cart_item)
     request.app.db.commit()
     return JSONResponse(
@@ -144,31 +186,41 @@ def get_cart(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized"
         )
-    cart = request.app.db.query(Cart).filter_by(user_id=user.id).first()
-    if not cart:
-        return JSONResponse(
-            content={"items": [], "total_price": 0}, status_code=status.HTTP_200_OK
+    with db_instance.read_replica():
+        cart = request.app.db.query(Cart).filter_by(user_id=user.id).first()
+        if not cart:
+            return JSONResponse(
+                content={"items": [], "total_price": 0}, status_code=status.HTTP_200_OK
+            )
+        items = []
+        total = 0
+        held_until = dict(
+            request.app.db.query(Reservation.article_id, Reservation.expires_at).filter(
+                Reservation.cart_id == cart.id
+            )
         )
-    items = []
-    total = 0
-    for item in cart.items:
-        article = request.app.db.query(Article).filter_by(id=item.article_id).first()
-        if article:
-            subtotal = article.price * item.quantity
-            items.append(
-                {
-                    "article_id": article.id,
-                    "name": article.name,
-                    "price": article.price,
-                    "quantity": item.quantity,
-                    "total": subtotal,
-                }
+        for item in cart.items:
+            article = (
+                request.app.db.query(Article).filter_by(id=item.article_id).first()
             )
-            total += subtotal
-    return JSONResponse(
-        content={"items": items, "total_price": total, "cart_id": cart.id},
-        status_code=status.HTTP_200_OK,
-    )
+            if article:
+                subtotal = article.price * item.quantity
+                held = held_until.get(article.id)
+                items.append(
+                    {
+                        "article_id": article.id,
+                        "name": article.name,
+                        "price": article.price,
+                        "quantity": item.quantity,
+                        "total": subtotal,
+                        "reservado_hasta": str(held) if held else None,
+                    }
+                )
+                total += subtotal
+        return JSONResponse(
+            content={"items": items, "total_price": total, "cart_id": cart.id},
+            status_code=status.HTTP_200_OK,
+        )
 
 
 @router.delete("/vaciar")
@@ -186,6 +238,7 @@ def clear_cart(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Carrito no encontrado"
         )
+    release_stock(request.app.db, cart.id)
     request.app.db.query(CartItemModel).filter_by(cart_id=cart.id).delete()
     request.app.db.delete(cart)
     request.app.db.commit()
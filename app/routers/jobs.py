@@ -0,0 +1,73 @@
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
+from fastapi.security import OAuth2PasswordBearer
+
+from app.models.models import Job
+from app.models.schemas.const import JOB_STATUSES
+from app.routers.auth import get_current_user
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+router = APIRouter(
+    prefix="/tareas",
+    tags=["tareas"],
+    responses={status.HTTP_404_NOT_FOUND: {"description": "Not found"}},
+)
+
+
+def job_to_json(job: Job):
+    return {
+        "id": job.id,
+        "tipo": job.kind,
+        "estado": job.status,
+        "intentos": job.attempts,
+        "max_intentos": job.max_attempts,
+        "proximo_intento": job.run_after.isoformat() if job.run_after else None,
+        "error": job.last_error,
+        "resultado": json.loads(job.result) if job.result else None,
+        "created_at": str(job.created_at),
+        "updated_at": str(job.updated_at),
+    }
+
+
+@router.get("/")
+def list_jobs(
+    request: Request,
+    estado: Optional[JOB_STATUSES] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    token: str = Depends(oauth2_scheme),
+):
+    user = get_current_user(request, token)
+    if not user or getattr(user, "role", None) != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores pueden consultar las tareas",
+        )
+    query = request.app.db.query(Job)
+    if estado:
+        query = query.filter(Job.status == estado)
+    jobs = query.order_by(Job.created_at.desc()).limit(limit).populate_existing().all()
+    return JSONResponse(
+        content={"tareas": [job_to_json(job) for job in jobs]},
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@router.get("/{job_id}")
+def get_job(request: Request, job_id: str, token: str = Depends(oauth2_scheme)):
+    user = get_current_user(request, token)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized"
+        )
+    job = request.app.db.query(Job).filter_by(id=job_id).populate_existing().first()
+    if not job or (user.role != "admin" and job.user_id != user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Tarea no encontrada"
+        )
+    return JSONResponse(
+        content={"tarea": job_to_json(job)},
+        status_code=status.HTTP_200_OK,
+    )
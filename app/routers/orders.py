@@ -0,0 +1,97 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import selectinload
+
+from app.models.models import Order
+from app.routers.auth import get_current_user
+from app.routers.pagination import decode_cursor, encode_cursor
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+router = APIRouter(
+    prefix="/pedidos",
+    tags=["pedidos"],
+    responses={status.HTTP_404_NOT_FOUND: {"description": "Not found"}},
+)
+
+
+def order_to_json(order: Order):
+    return {
+        "id": order.id,
+        "precio_total": order.total_price,
+        "cantidad_total": order.total_quantity,
+        "created_at": str(order.created_at),
+        "lineas": [
+            {
+                "article_id": line.article_id,
+                "name": line.name,
+                "price": line.unit_price,
+                "quantity": line.quantity,
+                "total": line.unit_price * line.quantity,
+            }
+            for line in order.lines
+        ],
+    }
+
+
+@router.get("/")
+def get_orders(
+    request: Request,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    token: str = Depends(oauth2_scheme),
+):
+    user = get_current_user(request, token)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized"
+        )
+    # Newest first along the (user_id, created_at) index
+    query = request.app.db.query(Order).filter(Order.user_id == user.id)
+    if cursor:
+        created_at, last_id = decode_cursor(cursor, datetime.fromisoformat, None)
+        query = query.filter(
+            or_(
+                Order.created_at < created_at,
+                and_(Order.created_at == created_at, Order.id < last_id),
+            )
+        )
+    orders = (
+        query.order_by(Order.created_at.desc(), Order.id.desc())
+        .options(selectinload(Order.lines))
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_cursor(orders[-1].created_at, orders[-1].id)
+    return JSONResponse(
+        content={
+            "pedidos": [order_to_json(order) for order in orders],
+            "siguiente_cursor": next_cursor,
+        },
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@router.get("/{order_id}")
+def get_order(request: Request, order_id: str, token: str = Depends(oauth2_scheme)):
+    user = get_current_user(request, token)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized"
+        )
+    order = request.app.db.query(Order).filter_by(id=order_id, user_id=user.id).first()
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Pedido no encontrado"
+        )
+    return JSONResponse(
+        content={"pedido": order_to_json(order)},
+        status_code=status.HTTP_200_OK,
+    )
@@ -0,0 +1,37 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(*values) -> str:
+    """
+    returns an opaque keyset cursor for the last row of a page
+    """
+    raw = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ]
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, *parsers) -> list:
+    """
+    decodes a cursor built by encode_cursor, applying parsers[i] (if not None)
+    to the i-th value
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor))
+        if len(values) != len(parsers):
+            raise ValueError(cursor)
+        return [
+            parser(value) if parser and value is not None else value
+            for parser, value in zip(parsers, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido"
+        )
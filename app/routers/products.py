@@ -1,11 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from fastapi.responses import JSONResponse
+import json
+import operator
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import load_only
 
+from app.config import settings
+from app.db.database import db_instance
+from app.db.ids import new_id
+from app.middleware.compression import choose_encoding
 from app.models.models import Article
+from app.models.schemas.const import CATEGORIES
 from app.models.schemas.products import (AdvancedSearchForm, CreateArticleForm,
                                          UpdateArticleForm)
 from app.routers.auth import get_current_user
+from app.routers.pagination import decode_cursor, encode_cursor
+from app.services.catalog_cache import catalog_cache
+from app.services.facets import category_facets
+from app.services.jobs import enqueue
+from app.services.reservations import reservation_ledger
+from app.services.search import search_index
+from app.services.stream import article_feed
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 router = APIRouter(
@@ -23,40 +42,113 @@ def get_all_articles(request: Request, token: str = Depends(oauth2_scheme)):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authorized",
         )
-    all_articles = request.app.db.query(Article).all()
 
-    return JSONResponse(
-        content={
+    def render():
+        # The thread's session keeps objects across requests: re-read them so
+        # the cached bytes match the committed rows
+        all_articles = request.app.db.query(Article).populate_existing().all()
+        return {
             "articulos": (
                 [article.to_json() for article in all_articles] if all_articles else []
             ),
-        },
+        }
+
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    payload, applied = catalog_cache.get(catalog_cache.version, encoding, render)
+    headers = {"Vary": "Accept-Encoding"}
+    if applied:
+        headers["Content-Encoding"] = applied
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers=headers,
         status_code=status.HTTP_200_OK,
     )
 
 
-@router.get("/detalle-articulo/{article_id}")
-def get_article(request: Request, article_id: str, token: str = Depends(oauth2_scheme)):
+@router.get("/facetas")
+def get_category_facets(request: Request, token: str = Depends(oauth2_scheme)):
     user = get_current_user(request, token)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authorized",
         )
-    article = request.app.db.query(Article).filter_by(id=article_id).first()
-    if not article:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Artículo no encontrado",
-        )
     return JSONResponse(
-        content={
-            "articulo": article.to_json(),
-        },
+        content={"categorias": category_facets.snapshot()},
         status_code=status.HTTP_200_OK,
     )
 
 
+@router.get("/cambios")
+def stream_article_changes(
+    request: Request,
+    ids: Optional[List[str]] = Query(default=None),
+    categoria: Optional[CATEGORIES] = None,
+    token: str = Depends(oauth2_scheme),
+):
+    """
+    Server-Sent Events feed of stock and price changes, optionally limited to
+    some article ids or one category. A `resync` event means the client fell
+    behind and should reload the articles it follows.
+    """
+    user = get_current_user(request, token)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authorized",
+        )
+
+    async def events():
+        subscription = article_feed.subscribe(ids, categoria)
+        try:
+            yield ": conectado\n\n"
+            while True:
+                batch, lagged = await subscription.next_batch(
+                    settings.stream_heartbeat_seconds
+                )
+                if lagged:
+                    yield "event: resync\ndata: {}\n\n"
+                for event in batch:
+                    yield f"event: articulo\ndata: {json.dumps(event)}\n\n"
+                if not batch and not lagged:
+                    yield ": ping\n\n"
+        finally:
+            article_feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/detalle-articulo/{article_id}")
+def get_article(request: Request, article_id: str, token: str = Depends(oauth2_scheme)):
+    user = get_current_user(request, token)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authorized",
+        )
+    with db_instance.read_replica():
+        article = request.app.db.query(Article).filter_by(id=article_id).first()
+        if not article:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Artículo no encontrado",
+            )
+        return JSONResponse(
+            content={
+                "articulo": {
+                    **article.to_json(),
+                    "stock_disponible": reservation_ledger.available(article),
+                },
+            },
+            status_code=status.HTTP_200_OK,
+        )
+
+
 @router.post("/agregar-articulo", status_code=status.HTTP_201_CREATED)
 def add_article(
     request: Request,
@@ -120,6 +212,47 @@ def add_multiple_articles(
     )
 
 
+@router.post("/importar-articulos", status_code=status.HTTP_202_ACCEPTED)
+def import_articles_in_background(
+    request: Request,
+    articles_data: list[CreateArticleForm],
+    token: str = Depends(oauth2_scheme),
+):
+    user = get_current_user(request, token)
+    if not user or getattr(user, "role", None) != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores pueden agregar artículos",
+        )
+    payload = [
+        {"id": new_id(), **article_data.model_dump()} for article_data in articles_data
+    ]
+    job = enqueue(request.app.db, "import_articles", payload, user_id=user.id)
+    request.app.db.commit()
+    return JSONResponse(
+        content={"message": "Importación en curso", "tarea_id": job.id},
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+
+
+@router.post("/reconciliar-stock", status_code=status.HTTP_202_ACCEPTED)
+def reconcile_stock_in_background(
+    request: Request, token: str = Depends(oauth2_scheme)
+):
+    user = get_current_user(request, token)
+    if not user or getattr(user, "role", None) != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores pueden reconciliar el stock",
+        )
+    job = enqueue(request.app.db, "reconcile_stock", {}, user_id=user.id)
+    request.app.db.commit()
+    return JSONResponse(
+        content={"message": "Reconciliación en curso", "tarea_id": job.id},
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+
+
 @router.put("/actualizar/{article_id}")
 def update_article(
     request: Request,
@@ -133,7 +266,14 @@ def update_article(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Solo los administradores pueden actualizar artículos",
         )
-    article = request.app.db.query(Article).filter_by(id=article_id).first()
+    # Re-read: the change snapshots fed to the in-memory aggregates come from
+    # this object, which the thread's session may hold from an older request
+    article = (
+        request.app.db.query(Article)
+        .populate_existing()
+        .filter_by(id=article_id)
+        .first()
+    )
     if not article:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -175,7 +315,12 @@ def delete_article(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Solo los administradores pueden eliminar artículos",
         )
-    article = request.app.db.query(Article).filter_by(id=article_id).first()
+    article = (
+        request.app.db.query(Article)
+        .populate_existing()
+        .filter_by(id=article_id)
+        .first()
+    )
     if not article:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -190,25 +335,57 @@ def delete_article(
 
 
 @router.get("/buscar")
-def search_articles(request: Request, query: str, token: str = Depends(oauth2_scheme)):
+def search_articles(
+    request: Request,
+    query: str,
+    limit: int = Query(default=20, ge=1, le=100),
+    token: str = Depends(oauth2_scheme),
+):
     user = get_current_user(request, token)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authorized",
         )
-    articles = (
-        request.app.db.query(Article).filter(Article.name.ilike(f"%{query}%")).all()
-    )
-    if not articles:
+    with db_instance.read_replica():
+        ranked_ids = search_index.search(query, limit=limit)
+        found = {
+            article.id: article
+            for article in request.app.db.query(Article)
+            .filter(Article.id.in_(ranked_ids))
+            .all()
+        }
+        articles = [
+            found[article_id] for article_id in ranked_ids if article_id in found
+        ]
+        if not articles:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No se encontraron artículos",
+            )
+        return JSONResponse(
+            content={
+                "articulos": [article.to_json() for article in articles],
+            },
+            status_code=status.HTTP_200_OK,
+        )
+
+
+@router.get("/autocompletar")
+def autocomplete_articles(
+    request: Request,
+    query: str,
+    limit: int = Query(default=10, ge=1, le=50),
+    token: str = Depends(oauth2_scheme),
+):
+    user = get_current_user(request, token)
+    if not user:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No se encontraron artículos",
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authorized",
         )
     return JSONResponse(
-        content={
-            "articulos": [article.to_json() for article in articles],
-        },
+        content={"sugerencias": search_index.autocomplete(query, limit=limit)},
         status_code=status.HTTP_200_OK,
     )
 
@@ -224,17 +401,81 @@ def advanced_search(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized"
         )
-    query = request.app.db.query(Article)
-    if search.name:
-        query = query.filter(Article.name.ilike(f"%{search.name}%"))
-    if search.category:
-        query = query.filter(Article.category.ilike(f"%{search.category}%"))
-    if search.min_price is not None:
-        query = query.filter(Article.price >= search.min_price)
-    if search.max_price is not None:
-        query = query.filter(Article.price <= search.max_price)
-    results = query.all()
-    return JSONResponse(
-        content={"articulos": [a.to_json() for a in results]},
-        status_code=status.HTTP_200_OK,
-    )
+    with db_instance.read_replica():
+        query = request.app.db.query(Article)
+        if search.name:
+            query = query.filter(Article.name.ilike(f"%{search.name}%"))
+        if search.category:
+            query = query.filter(Article.category.ilike(f"%{search.category}%"))
+        if search.min_price is not None:
+            query = query.filter(Article.price >= search.min_price)
+        if search.max_price is not None:
+            query = query.filter(Article.price <= search.max_price)
+        if search.in_stock is not None:
+            query = query.filter(
+                Article.stock > 0 if search.in_stock else Article.stock <= 0
+            )
+        if search.min_stock is not None:
+            query = query.filter(Article.stock >= search.min_stock)
+
+        # Sort on (column, id) so pages are stable and a cursor is unambiguous
+        sort_column = getattr(Article, search.sort_by) if search.sort_by else Article.id
+        descending = search.sort_order == "desc"
+        if search.cursor:
+            if search.offset:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="offset y cursor no se pueden combinar",
+                )
+            parse_value = (
+                datetime.fromisoformat if search.sort_by == "created_at" else None
+            )
+            sort_by, sort_order, sort_value, last_id = decode_cursor(
+                search.cursor, None, None, parse_value, None
+            )
+            if (sort_by, sort_order) != (search.sort_by, search.sort_order):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="El cursor corresponde a otro orden",
+                )
+            after = operator.lt if descending else operator.gt
+            if search.sort_by:
+                query = query.filter(
+                    or_(
+                        after(sort_column, sort_value),
+                        and_(sort_column == sort_value, after(Article.id, last_id)),
+                    )
+                )
+            else:
+                query = query.filter(after(Article.id, last_id))
+        if descending:
+            query = query.order_by(sort_column.desc(), Article.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), Article.id.asc())
+
+        if search.fields:
+            columns = {"id", *search.fields}
+            if search.sort_by:
+                columns.add(search.sort_by)
+            query = query.options(load_only(*(getattr(Article, c) for c in columns)))
+
+        results = query.offset(search.offset).limit(search.limit + 1).all()
+        next_cursor = None
+        if len(results) > search.limit:
+            results = results[: search.limit]
+            last = results[-1]
+            next_cursor = encode_cursor(
+                search.sort_by,
+                search.sort_order,
+                getattr(last, search.sort_by) if search.sort_by else None,
+                last.id,
+            )
+
+        articles = [a.to_json() for a in results]
+        if search.fields:
+            keys = ("id", *search.fields)
+            articles = [{k: a[k] for k in keys if k in a} for a in articles]
+        return JSONResponse(
+            content={"articulos": articles, "siguiente_cursor": next_cursor},
+            status_code=status.HTTP_200_OK,
+        )
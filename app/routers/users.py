@@ -0,0 +1,67 @@
+import json
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+
+from app.db.database import db_instance
+from app.models.models import Admin
+from app.routers.auth import get_current_user
+from app.routers.pagination import decode_cursor, encode_cursor
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+router = APIRouter(
+    prefix="/usuarios",
+    tags=["usuarios"],
+    responses={status.HTTP_404_NOT_FOUND: {"description": "Not found"}},
+)
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def _export_shoppers(request: Request):
+    # Runs outside the request session: the stream outlives the endpoint call
+    session = db_instance.session.session_factory()
+    try:
+        after_id = None
+        while True:
+            shoppers = Admin.get_all_shoppers(
+                request, limit=EXPORT_BATCH_SIZE, after_id=after_id, session=session
+            )
+            if not shoppers:
+                return
+            yield "".join(json.dumps(shopper) + "\n" for shopper in shoppers)
+            after_id = shoppers[-1]["id"]
+    finally:
+        session.close()
+
+
+@router.get("/compradores")
+def get_shoppers(
+    request: Request,
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    formato: Literal["json", "ndjson"] = "json",
+    token: str = Depends(oauth2_scheme),
+):
+    user = get_current_user(request, token)
+    if not user or getattr(user, "role", None) != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores pueden consultar los compradores",
+        )
+    if formato == "ndjson":
+        return StreamingResponse(
+            _export_shoppers(request), media_type="application/x-ndjson"
+        )
+    after_id = decode_cursor(cursor, None)[0] if cursor else None
+    shoppers = Admin.get_all_shoppers(request, limit=limit + 1, after_id=after_id)
+    next_cursor = None
+    if len(shoppers) > limit:
+        shoppers = shoppers[:limit]
+        next_cursor = encode_cursor(shoppers[-1]["id"])
+    return JSONResponse(
+        content={"compradores": shoppers, "siguiente_cursor": next_cursor},
+        status_code=status.HTTP_200_OK,
+    )
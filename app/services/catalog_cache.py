@@ -0,0 +1,56 @@
+import threading
+
+from starlette.responses import JSONResponse
+
+from app.config import settings
+from app.middleware.compression import compress
+from app.models.events import on_article_commit
+
+
+class CatalogCache:
+    """
+    Keeps the serialized full-catalog payload, and its compressed variants,
+    for the current catalog version. Any committed Article change bumps the
+    version and drops the cached bytes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = 0
+        self._body = None
+        self._encoded = {}
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+            self._body = None
+            self._encoded = {}
+
+    def get(self, version: int, encoding: str | None, render):
+        """
+        returns (payload, applied_encoding) for the given catalog version,
+        calling render() only when the version has not been serialized yet
+        """
+        with self._lock:
+            if version == self.version and encoding in self._encoded:
+                return self._encoded[encoding]
+            body = self._body if version == self.version else None
+        if body is None:
+            body = JSONResponse(content=render()).body
+        if encoding and len(body) >= settings.compression_min_size:
+            entry = (compress(body, encoding), encoding)
+        else:
+            entry = (body, None)
+        with self._lock:
+            if version == self.version:
+                self._body = body
+                self._encoded[encoding] = entry
+        return entry
+
+
+catalog_cache = CatalogCache()
+
+
+@on_article_commit
+def _invalidate_catalog(changes):
+    catalog_cache.bump()
@@ -0,0 +1,100 @@
+import threading
+from collections import Counter
+from typing import get_args
+
+from app.models.events import on_article_commit
+from app.models.models import Article
+from app.models.schemas.const import CATEGORIES
+
+
+class CategoryFacet:
+    def __init__(self):
+        self.count = 0
+        self.in_stock = 0
+        self.prices = Counter()
+        self._min = None
+        self._max = None
+        self._stale = False
+
+    def add(self, price, stock, sign=1):
+        self.count += sign
+        if stock and stock > 0:
+            self.in_stock += sign
+        if price is None:
+            return
+        self.prices[price] += sign
+        if self.prices[price] <= 0:
+            del self.prices[price]
+            if price in (self._min, self._max):
+                self._stale = True
+        elif not self._stale:
+            self._min = price if self._min is None else min(self._min, price)
+            self._max = price if self._max is None else max(self._max, price)
+
+    def price_range(self):
+        if self._stale:
+            self._min = min(self.prices, default=None)
+            self._max = max(self.prices, default=None)
+            self._stale = False
+        return self._min, self._max
+
+
+class CategoryFacets:
+    """
+    In-memory per-category aggregates (count, in-stock count, price range).
+    Loaded once at startup and kept current from committed Article changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._facets = {}
+
+    def load(self, session):
+        rows = session.query(Article.category, Article.price, Article.stock).all()
+        with self._lock:
+            self._facets = {}
+            for category, price, stock in rows:
+                self._facet(category).add(price, stock)
+
+    def apply(self, changes):
+        with self._lock:
+            for change in changes:
+                if change.before:
+                    self._facet(change.before["category"]).add(
+                        change.before["price"], change.before["stock"], sign=-1
+                    )
+                if change.after:
+                    self._facet(change.after["category"]).add(
+                        change.after["price"], change.after["stock"]
+                    )
+
+    def snapshot(self):
+        result = []
+        with self._lock:
+            for category in get_args(CATEGORIES):
+                facet = self._facets.get(category) or CategoryFacet()
+                min_price, max_price = facet.price_range()
+                result.append(
+                    {
+                        "categoria": category,
+                        "cantidad": facet.count,
+                        "con_stock": facet.in_stock,
+                        "precio_min": min_price,
+                        "precio_max": max_price,
+                    }
+                )
+        return result
+
+    def _facet(self, category):
+        facet = self._facets.get(category)
+        if facet is None:
+            facet = self._facets[category] = CategoryFacet()
+        return facet
+
+
+category_facets = CategoryFacets()
+
+
+@on_article_commit
+def _update_facets(changes):
+    category_facets.apply(changes)
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import logging
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.database import db_instance
+from app.models.models import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def job_handler(kind: str):
+    """
+    registers func(session, payload) as the handler for jobs of `kind`. The
+    handler runs in a worker thread with its own session and its return value
+    is stored as the job result
+    """
+
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+
+    return decorator
+
+
+def enqueue(session, kind: str, payload=None, user_id: str | None = None) -> Job:
+    """
+    adds a pending job to session; it becomes visible to workers when the
+    caller commits, so it is enqueued atomically with the caller's writes
+    """
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        status="pending",
+        attempts=0,
+        max_attempts=settings.job_max_attempts,
+        run_after=datetime.now(UTC),
+        user_id=user_id,
+    )
+    session.add(job)
+    # Woken before the commit, a worker would not see the job yet
+    session.info["wake_job_queue"] = True
+    return job
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_job_queue(session):
+    if session.info.pop("wake_job_queue", False):
+        job_queue.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_job_wakeup(session):
+    session.info.pop("wake_job_queue", None)
+
+
+class JobQueue:
+    """
+    asyncio workers draining the persistent `jobs` table. Jobs are claimed
+    with a conditional UPDATE so several workers never run the same job, and
+    failed jobs are retried with exponential backoff until max_attempts.
+    """
+
+    def __init__(self):
+        self._tasks = []
+        self._loop = None
+        self._wakeup = None
+
+    async def start(self, workers: int | None = None):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(self._recover)
+        for _ in range(settings.job_workers if workers is None else workers):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def wake(self):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _worker(self):
+        while True:
+            try:
+                ran = await asyncio.to_thread(self.run_next)
+            except Exception:
+                # e.g. "database is locked"; the job stays claimable or is
+                # recovered on the next start, keep draining the queue
+                logger.exception("Job worker iteration failed")
+                await asyncio.sleep(settings.job_poll_interval)
+                continue
+            if ran:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=settings.job_poll_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def run_next(self) -> bool:
+        """
+        claims and runs one due job; returns False when none is due
+        """
+        session = db_instance.session.session_factory()
+        try:
+            job = self._claim(session)
+            if job is None:
+                return False
+            handler = _handlers.get(job.kind)
+            try:
+                if handler is None:
+                    raise LookupError(f"No handler for job kind: {job.kind}")
+                result = handler(session, json.loads(job.payload))
+                job.status = "done"
+                job.result = json.dumps(result)
+                job.last_error = None
+            except Exception as e:
+                session.rollback()
+                logger.exception("Job %s (%s) failed", job.id, job.kind)
+                job = session.get(Job, job.id)
+                job.last_error = str(e)
+                if job.attempts >= job.max_attempts:
+                    job.status = "failed"
+                else:
+                    delay = settings.job_backoff_seconds * 2 ** (job.attempts - 1)
+                    job.status = "pending"
+                    job.run_after = datetime.now(UTC) + timedelta(seconds=delay)
+            session.commit()
+            return True
+        finally:
+            session.close()
+
+    @staticmethod
+    def _claim(session):
+        while True:
+            candidate = (
+                session.query(Job.id)
+                .filter(Job.status == "pending", Job.run_after <= datetime.now(UTC))
+                .order_by(Job.run_after)
+                .first()
+            )
+            if candidate is None:
+                return None
+            claimed = session.execute(
+                update(Job)
+                .where(Job.id == candidate.id, Job.status == "pending")
+                .values(status="running", attempts=Job.attempts + 1)
+            ).rowcount
+            session.commit()
+            if claimed:
+                return session.get(Job, candidate.id)
+
+    @staticmethod
+    def _recover():
+        # Jobs left running by a previous process are retried
+        session = db_instance.session.session_factory()
+        try:
+            session.execute(
+                update(Job).where(Job.status == "running").values(status="pending")
+            )
+            session.commit()
+        finally:
+            session.close()
+
+
+job_queue = JobQueue()
@@ -0,0 +1,240 @@
+import asyncio
+import heapq
+import logging
+import threading
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.database import db_instance
+from app.models.models import Reservation
+
+logger = logging.getLogger(__name__)
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; every stored value is UTC
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+class ReservationLedger:
+    """
+    In-memory counter of stock held by carts, per article. Availability is
+    stock minus the holds of other carts and costs a dict lookup. Expired
+    holds are dropped lazily through an expiry heap, and the `reservations`
+    table keeps the holds across restarts. The table is only read at startup,
+    so holds are shared within one process: run a single worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._holds = {}  # (article_id, cart_id) -> (quantity, expires_at)
+        self._reserved = {}  # article_id -> total held quantity
+        self._by_cart = {}  # cart_id -> article ids
+        self._expiry = []  # heap of (expires_at, article_id, cart_id)
+
+    def load(self, session):
+        now = datetime.now(UTC)
+        rows = session.query(Reservation).filter(Reservation.expires_at > now).all()
+        with self._lock:
+            self._clear()
+            for row in rows:
+                self._set(
+                    row.article_id, row.cart_id, row.quantity, _aware(row.expires_at)
+                )
+
+    def reserved(self, article_id, exclude_cart=None) -> int:
+        with self._lock:
+            self._expire(datetime.now(UTC))
+            total = self._reserved.get(article_id, 0)
+            if exclude_cart is not None:
+                total -= self._holds.get((article_id, exclude_cart), (0, None))[0]
+            return total
+
+    def available(self, article, exclude_cart=None) -> int:
+        return (article.stock or 0) - self.reserved(article.id, exclude_cart)
+
+    def try_hold(self, article, cart_id, quantity, expires_at):
+        """
+        sets the cart's hold on article to quantity if enough unreserved
+        stock is left, atomically with respect to other carts. Returns
+        (held, previous hold or None) so the caller can undo it
+        """
+        with self._lock:
+            self._expire(datetime.now(UTC))
+            previous = self._holds.get((article.id, cart_id))
+            others = self._reserved.get(article.id, 0) - (previous or (0, None))[0]
+            if (article.stock or 0) - others < quantity:
+                return False, previous
+            self._set(article.id, cart_id, quantity, expires_at)
+            return True, previous
+
+    def restore(self, article_id, cart_id, previous):
+        """
+        puts back the hold try_hold replaced (previous=None drops it)
+        """
+        with self._lock:
+            if previous is None:
+                self._drop(article_id, cart_id)
+            else:
+                self._set(article_id, cart_id, *previous)
+
+    def release(self, article_id, cart_id):
+        with self._lock:
+            self._drop(article_id, cart_id)
+
+    def release_cart(self, cart_id):
+        with self._lock:
+            for article_id in list(self._by_cart.get(cart_id, ())):
+                self._drop(article_id, cart_id)
+
+    def expire(self) -> int:
+        with self._lock:
+            return self._expire(datetime.now(UTC))
+
+    def _set(self, article_id, cart_id, quantity, expires_at):
+        self._drop(article_id, cart_id)
+        self._holds[(article_id, cart_id)] = (quantity, expires_at)
+        self._reserved[article_id] = self._reserved.get(article_id, 0) + quantity
+        self._by_cart.setdefault(cart_id, set()).add(article_id)
+        heapq.heappush(self._expiry, (expires_at, article_id, cart_id))
+
+    def _drop(self, article_id, cart_id):
+        hold = self._holds.pop((article_id, cart_id), None)
+        if hold is None:
+            return
+        self._reserved[article_id] -= hold[0]
+        if not self._reserved[article_id]:
+            del self._reserved[article_id]
+        self._by_cart[cart_id].discard(article_id)
+        if not self._by_cart[cart_id]:
+            del self._by_cart[cart_id]
+
+    def _expire(self, now) -> int:
+        expired = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, article_id, cart_id = heapq.heappop(self._expiry)
+            hold = self._holds.get((article_id, cart_id))
+            # Renewed holds leave stale heap entries behind
+            if hold is not None and hold[1] == expires_at:
+                self._drop(article_id, cart_id)
+                expired += 1
+        return expired
+
+
+reservation_ledger = ReservationLedger()
+
+
+def hold_stock(session, cart_id, article, quantity) -> bool:
+    """
+    holds quantity of article for the cart line for RESERVATION_TTL_SECONDS.
+    The row is added to session and persisted by the caller's commit; the
+    in-memory hold is taken now, so concurrent carts see it, and undone if
+    the session rolls back
+    """
+    if quantity <= 0:
+        # A negative hold would hand its units to other carts
+        return False
+    expires_at = datetime.now(UTC) + timedelta(seconds=settings.reservation_ttl_seconds)
+    held, previous = reservation_ledger.try_hold(article, cart_id, quantity, expires_at)
+    if not held:
+        return False
+    session.info.setdefault("reservation_undo", []).append(
+        (article.id, cart_id, previous)
+    )
+    reservation = (
+        session.query(Reservation)
+        .filter_by(cart_id=cart_id, article_id=article.id)
+        .first()
+    )
+    if reservation is None:
+        reservation = Reservation(cart_id=cart_id, article_id=article.id)
+        session.add(reservation)
+    reservation.quantity = quantity
+    reservation.expires_at = expires_at
+    return True
+
+
+def release_stock(session, cart_id, article_id=None):
+    """
+    drops the cart's holds, or only the one on article_id. The in-memory
+    holds are released when the session commits
+    """
+    query = session.query(Reservation).filter_by(cart_id=cart_id)
+    if article_id is not None:
+        query = query.filter_by(article_id=article_id)
+    query.delete()
+    session.info.setdefault("reservation_releases", []).append((cart_id, article_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_reservation_changes(session):
+    session.info.pop("reservation_undo", None)
+    for cart_id, article_id in session.info.pop("reservation_releases", ()):
+        if article_id is None:
+            reservation_ledger.release_cart(cart_id)
+        else:
+            reservation_ledger.release(article_id, cart_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_reservation_changes(session):
+    session.info.pop("reservation_releases", None)
+    for article_id, cart_id, previous in reversed(
+        session.info.pop("reservation_undo", ())
+    ):
+        reservation_ledger.restore(article_id, cart_id, previous)
+
+
+class ReservationSweeper:
+    """
+    periodically drops expired holds from memory and from the table
+    """
+
+    def __init__(self):
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.reservation_sweep_seconds)
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception:
+                logger.exception("Reservation sweep failed")
+
+    @staticmethod
+    def sweep() -> int:
+        reservation_ledger.expire()
+        # Rows get a grace period so a hold being renewed right now is not
+        # deleted under the request that is updating it
+        cutoff = datetime.now(UTC) - timedelta(
+            seconds=settings.reservation_sweep_seconds
+        )
+        session = db_instance.session.session_factory()
+        try:
+            deleted = (
+                session.query(Reservation)
+                .filter(Reservation.expires_at <= cutoff)
+                .delete()
+            )
+            session.commit()
+            return deleted
+        finally:
+            session.close()
+
+
+reservation_sweeper = ReservationSweeper()
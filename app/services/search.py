@@ -0,0 +1,173 @@
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+from app.config import settings
+from app.models.events import on_article_commit
+from app.models.models import Article
+
+NAME_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: str | None) -> str:
+    """
+    lowercases text, strips accents and collapses punctuation into spaces
+    """
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", stripped).strip()
+
+
+def tokenize(text: str | None) -> list[str]:
+    return normalize(text).split()
+
+
+def trigrams(token: str) -> set[str]:
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    In-memory, accent-insensitive search over Article name and description.
+    Query tokens are matched against the indexed vocabulary by trigram
+    similarity, so small typos still find the article; a sorted vocabulary
+    serves prefix autocomplete. Kept current from committed Article changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._docs = {}  # article id -> (name, {token: weight})
+        self._token_docs = defaultdict(dict)  # token -> {article id: weight}
+        self._gram_tokens = defaultdict(set)  # trigram -> tokens
+        self._vocabulary = []  # sorted tokens, for prefix lookups
+
+    def load(self, session):
+        rows = session.query(Article.id, Article.name, Article.description).all()
+        with self._lock:
+            self._clear()
+            for article_id, name, description in rows:
+                self._add(article_id, name, description)
+
+    def apply(self, changes):
+        with self._lock:
+            for change in changes:
+                self._remove(change.article_id)
+                if change.after:
+                    self._add(
+                        change.article_id,
+                        change.after["name"],
+                        change.after["description"],
+                    )
+
+    def search(self, query: str, limit: int = 20) -> list[str]:
+        """
+        returns article ids ranked by fuzzy match of every query token
+        """
+        scores = Counter()
+        with self._lock:
+            for token in set(tokenize(query)):
+                best = {}
+                for candidate, similarity in self._similar_tokens(token):
+                    for article_id, weight in self._token_docs[candidate].items():
+                        score = similarity * weight
+                        if score > best.get(article_id, 0):
+                            best[article_id] = score
+                scores.update(best)
+        return [article_id for article_id, _ in scores.most_common(limit)]
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> list[dict]:
+        """
+        returns articles whose name contains the complete query tokens and a
+        token starting with the last one
+        """
+        tokens = tokenize(prefix)
+        if not tokens:
+            return []
+        *complete, partial = tokens
+        with self._lock:
+            matches = None
+            for token in complete:
+                ids = {
+                    article_id
+                    for article_id, weight in self._token_docs.get(token, {}).items()
+                    if weight == NAME_WEIGHT
+                }
+                matches = ids if matches is None else matches & ids
+            suggestions = []
+            seen = set()
+            index = bisect_left(self._vocabulary, partial)
+            while index < len(self._vocabulary) and len(suggestions) < limit:
+                token = self._vocabulary[index]
+                if not token.startswith(partial):
+                    break
+                for article_id, weight in self._token_docs[token].items():
+                    if weight != NAME_WEIGHT or article_id in seen:
+                        continue
+                    if matches is not None and article_id not in matches:
+                        continue
+                    seen.add(article_id)
+                    suggestions.append(
+                        {"id": article_id, "name": self._docs[article_id][0]}
+                    )
+                    if len(suggestions) >= limit:
+                        break
+                index += 1
+        return suggestions
+
+    def _similar_tokens(self, token):
+        grams = trigrams(token)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._gram_tokens.get(gram, ()))
+        for candidate, count in shared.items():
+            similarity = 2 * count / (len(grams) + len(candidate) + 1)
+            if candidate.startswith(token):
+                similarity = max(similarity, 0.9)
+            if similarity >= settings.search_min_similarity:
+                yield candidate, similarity
+
+    def _add(self, article_id, name, description):
+        weights = {token: DESCRIPTION_WEIGHT for token in tokenize(description)}
+        weights.update({token: NAME_WEIGHT for token in tokenize(name)})
+        self._docs[article_id] = (name, weights)
+        for token, weight in weights.items():
+            if token not in self._token_docs:
+                insort(self._vocabulary, token)
+                for gram in trigrams(token):
+                    self._gram_tokens[gram].add(token)
+            self._token_docs[token][article_id] = weight
+
+    def _remove(self, article_id):
+        doc = self._docs.pop(article_id, None)
+        if doc is None:
+            return
+        for token in doc[1]:
+            postings = self._token_docs[token]
+            postings.pop(article_id, None)
+            if postings:
+                continue
+            del self._token_docs[token]
+            del self._vocabulary[bisect_left(self._vocabulary, token)]
+            for gram in trigrams(token):
+                self._gram_tokens[gram].discard(token)
+                if not self._gram_tokens[gram]:
+                    del self._gram_tokens[gram]
+
+
+search_index = SearchIndex()
+
+
+@on_article_commit
+def _update_search_index(changes):
+    search_index.apply(changes)
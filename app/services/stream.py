@@ -0,0 +1,111 @@
+import asyncio
+
+from app.config import settings
+from app.models.events import on_article_commit
+
+
+def _delta(change):
+    """
+    returns the stock/price event for an ArticleChange, or None when neither
+    changed
+    """
+    current = change.after or change.before
+    if change.op == "update" and all(
+        change.before[field] == change.after[field] for field in ("stock", "price")
+    ):
+        return None
+    return {
+        "id": change.article_id,
+        "op": change.op,
+        "category": current["category"],
+        "stock": change.after["stock"] if change.after else None,
+        "price": change.after["price"] if change.after else None,
+    }
+
+
+class Subscription:
+    """
+    One connected client. Pending events are coalesced per article, so a slow
+    client holds at most one event per article and never more than
+    max_pending; past that it is marked lagged and told to resync.
+    """
+
+    def __init__(self, article_ids=None, category=None, max_pending=None):
+        self.article_ids = set(article_ids) if article_ids else None
+        self.category = category
+        self.max_pending = max_pending or settings.stream_max_pending
+        self.pending = {}
+        self.lagged = False
+        self.ready = asyncio.Event()
+
+    def matches(self, event):
+        if self.article_ids is not None and event["id"] not in self.article_ids:
+            return False
+        return self.category is None or event["category"] == self.category
+
+    def push(self, event):
+        if self.lagged:
+            return
+        self.pending.pop(event["id"], None)
+        if len(self.pending) >= self.max_pending:
+            self.pending.clear()
+            self.lagged = True
+        else:
+            self.pending[event["id"]] = event
+        self.ready.set()
+
+    async def next_batch(self, timeout: float):
+        """
+        waits up to timeout for events; returns (events, lagged)
+        """
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return [], False
+        self.ready.clear()
+        events, lagged = list(self.pending.values()), self.lagged
+        self.pending = {}
+        self.lagged = False
+        return events, lagged
+
+
+class ArticleFeed:
+    """
+    Fans committed Article stock and price changes out to subscribers. Commit
+    hooks run in worker threads, so events are handed to the event loop.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._subscriptions = set()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+
+    def subscribe(self, article_ids=None, category=None) -> Subscription:
+        subscription = Subscription(article_ids, category)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscriptions.discard(subscription)
+
+    def publish(self, changes):
+        events = [event for event in map(_delta, changes) if event]
+        if not events or self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._dispatch, events)
+
+    def _dispatch(self, events):
+        for subscription in self._subscriptions:
+            for event in events:
+                if subscription.matches(event):
+                    subscription.push(event)
+
+
+article_feed = ArticleFeed()
+
+
+@on_article_commit
+def _publish_article_changes(changes):
+    article_feed.publish(changes)
@@ -0,0 +1,41 @@
+from app.models.models import Article
+from app.services.jobs import job_handler
+
+IMPORT_BATCH_SIZE = 500
+
+
+@job_handler("import_articles")
+def import_articles(session, payload):
+    """
+    inserts the articles in batches. Ids are assigned when the job is
+    enqueued, so a retry after a partial import skips rows already written
+    """
+    imported = 0
+    for start in range(0, len(payload), IMPORT_BATCH_SIZE):
+        batch = payload[start : start + IMPORT_BATCH_SIZE]
+        existing = {
+            row.id
+            for row in session.query(Article.id).filter(
+                Article.id.in_([data["id"] for data in batch])
+            )
+        }
+        for data in batch:
+            if data["id"] not in existing:
+                session.add(Article(**data))
+                imported += 1
+        session.commit()
+    return {"importados": imported, "total": len(payload)}
+
+
+@job_handler("reconcile_stock")
+def reconcile_stock(session, payload):
+    """
+    clamps negative stock to zero. The commit hooks carry the changes to the
+    in-memory catalog aggregates
+    """
+    adjusted = 0
+    for article in session.query(Article).filter(Article.stock < 0):
+        article.stock = 0
+        adjusted += 1
+    session.commit()
+    return {"ajustados": adjusted}
@@ -1,3 +1,4 @@
+import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
@@ -5,14 +6,42 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.db.database import Base, db_instance
-from app.routers import auth, cart, products
+from app.db.schema import ensure_schema
+from app.middleware.compression import CompressionMiddleware
+from app.routers import auth, cart, jobs, orders, products, users
+from app.services import tasks  # noqa: F401  registers the job handlers
+from app.services.facets import category_facets
+from app.services.jobs import job_queue
+from app.services.reservations import reservation_ledger, reservation_sweeper
+from app.services.search import search_index
+from app.services.stream import article_feed
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Startup phase: everything that touches the environment or the database
+    if not settings.jwt_secret:
+        logger.warning("JWT_SECRET no encontrado en variables de entorno")
+    if not settings.jwt_algorithm:
+        logger.warning("JWT_ALGORITHM no encontrado en variables de entorno")
     app.db = db_instance.get_session()
-    Base.metadata.create_all(bind=db_instance.engine)
+    if ensure_schema(db_instance.engine, Base.metadata):
+        logger.info("Esquema de base de datos actualizado")
+    category_facets.load(app.db)
+    search_index.load(app.db)
+    reservation_ledger.load(app.db)
+    article_feed.start()
+    reservation_sweeper.start()
+    if db_instance.replicas is not None:
+        await db_instance.replicas.start()
+    await job_queue.start()
     yield
+    await job_queue.stop()
+    if db_instance.replicas is not None:
+        await db_instance.replicas.stop()
+    await reservation_sweeper.stop()
 
 
 app = FastAPI(
@@ -35,8 +64,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(CompressionMiddleware)
+
 app.include_router(auth.router)
 
 app.include_router(products.router)
 
 app.include_router(cart.router)
+
+app.include_router(orders.router)
+
+app.include_router(jobs.router)
+
+app.include_router(users.router)
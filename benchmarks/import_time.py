@@ -0,0 +1,59 @@
+"""
+Measures the cold import cost of the application and fails when it exceeds
+a budget, or when importing it prints anything or touches the database.
+
+    python -m benchmarks.import_time --max-ms 1500
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+MODULE = "app.webapp"
+
+
+def measure(env) -> tuple[float, str]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULE}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\S+)$", line)
+        if match and match.group(2) == MODULE:
+            return int(match.group(1)) / 1000, result.stdout
+    raise RuntimeError(f"{MODULE} not found in -X importtime output")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-ms", type=float, default=1500)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    database = os.path.join(directory, "import.db")
+    env = {**os.environ, "DB_URL": f"sqlite:///{database}"}
+    timings = []
+    for _ in range(args.runs):
+        elapsed, output = measure(env)
+        timings.append(elapsed)
+        if output:
+            sys.exit(f"importing {MODULE} printed output:\n{output}")
+    if os.path.exists(database):
+        sys.exit(f"importing {MODULE} opened the database")
+
+    median = statistics.median(timings)
+    print(f"{MODULE}: median {median:.0f} ms over {args.runs} runs")
+    if median > args.max_ms:
+        sys.exit(f"import time {median:.0f} ms exceeds budget of {args.max_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Compares read/write throughput of the default SQLite setup against the
+SQLITE_PERFORMANCE profile (WAL, tuned pragmas, serialized writer).
+
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 2 --seconds 5
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base, RoutingSession, create_engines
+from app.models.models import Article
+
+ARTICLES = 1000
+
+
+def run(performance: bool, readers: int, writers: int, seconds: float):
+    directory = tempfile.mkdtemp()
+    writer, reader = create_engines(
+        f"sqlite:///{os.path.join(directory, 'bench.db')}", performance
+    )
+    Base.metadata.create_all(bind=writer)
+    make_session = sessionmaker(
+        class_=RoutingSession, expire_on_commit=False, writer=writer, reader=reader
+    )
+    session = make_session()
+    ids = []
+    for i in range(ARTICLES):
+        article = Article(
+            name=f"Articulo {i}", category="Hogar", description="", price=i, stock=100
+        )
+        ids.append(article.id)
+        session.add(article)
+    session.commit()
+    session.close()
+
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def loop(kind):
+        session = make_session()
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                if kind == "reads":
+                    session.query(Article).filter_by(id=random.choice(ids)).first()
+                else:
+                    # expire_on_commit=False would otherwise hand back the
+                    # cached row without a SELECT
+                    article = session.get(
+                        Article, random.choice(ids), populate_existing=True
+                    )
+                    article.stock += 1
+                    session.commit()
+                done += 1
+            except OperationalError:
+                session.rollback()
+                errors += 1
+        session.close()
+        with lock:
+            counts[kind] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=loop, args=("reads",)) for _ in range(readers)]
+    threads += [threading.Thread(target=loop, args=("writes",)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.dispose()
+    reader.dispose()
+    return {key: value / seconds for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    for name, performance in (("default", False), ("performance", True)):
+        result = run(performance, args.readers, args.writers, args.seconds)
+        print(
+            f"{name:>12}: {result['reads']:>9.0f} reads/s "
+            f"{result['writes']:>7.0f} writes/s {result['errors']:>5.0f} errors/s"
+        )
+
+
+if __name__ == "__main__":
+    main()